@@ -1,2 +1,47 @@
-from . import *
-from .http import TBASession
+"""
+aiotba: asyncio wrapper for The Blue Alliance's APIv3.
+
+Everything here gets imported lazily (PEP 562 module __getattr__), so `import aiotba` is basically free and e.g. aiohttp
+only gets loaded once you actually make a TBASession.
+"""
+import importlib
+
+# typing is one of the slower stdlib imports; type checkers treat this name specially either way
+TYPE_CHECKING = False
+
+# name -> submodule it lives in
+_lazy_names = {
+    "TBASession": "http",
+    "AioTBAError": "http",
+    "TeamKey": "keys",
+    "EventKey": "keys",
+    "MatchKey": "keys",
+    "TBAClient": "sync",
+}
+
+# star-imports go through __getattr__ for these too
+__all__ = [*_lazy_names]
+
+_submodules = {
+    "breakdowns", "bus", "consts", "export", "http", "index", "keys", "models", "prefetch", "sharedcache", "sync",
+    "webhooks",
+}
+
+if TYPE_CHECKING:  # so autocomplete still works
+    from .http import TBASession, AioTBAError
+    from .keys import TeamKey, EventKey, MatchKey
+    from .sync import TBAClient
+
+
+def __getattr__(name):
+    if name in _lazy_names:
+        value = getattr(importlib.import_module("." + _lazy_names[name], __name__), name)
+        globals()[name] = value
+        return value
+    if name in _submodules:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_names) | _submodules)
@@ -0,0 +1,44 @@
+import argparse
+import asyncio
+import os
+import sys
+
+from .export import export, RESOURCES, WRITERS
+from .http import AioTBAError
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="aiotba", description="command line tools for the blue alliance api")
+    parser.add_argument("--key", default=os.environ.get("TBA_KEY"), help="TBA apiv3 key (default: $TBA_KEY)")
+    commands = parser.add_subparsers(dest="command")
+
+    ex = commands.add_parser("export", help="dump a full season to files")
+    ex.add_argument("--year", type=int, required=True)
+    ex.add_argument("--format", choices=sorted(WRITERS), default="ndjson")
+    ex.add_argument("--out", default=".", help="output directory (default: current directory)")
+    ex.add_argument("--concurrency", type=int, default=8, help="max requests in flight (default: 8)")
+    ex.add_argument("--only", nargs="+", choices=RESOURCES, default=RESOURCES, help="only export these")
+    ex.add_argument("--cache-dir", help="where to keep the etag cache for resuming (default: OUT/.aiotba-cache)")
+
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 1
+    if not args.key:
+        parser.error("a TBA key is required, pass --key or set TBA_KEY")
+
+    if args.command == "export":
+        import aiohttp
+        try:
+            counts = asyncio.run(export(args.key, args.year, args.out, args.format, args.concurrency, args.only,
+                                        args.cache_dir))
+        except (AioTBAError, aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+            print(f"export failed: {e}", file=sys.stderr)
+            return 1
+        for resource, count in sorted(counts.items()):
+            print(f"{resource}: {count}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
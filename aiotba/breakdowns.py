@@ -0,0 +1,232 @@
+"""
+Typed, compact score breakdowns.
+
+Match.score_breakdown comes back as a big nested dict which changes every season. Schemas for a season get registered
+here by year; compact() swaps a match's dict out for slotted records picked by the match's year, which is a lot
+smaller than thousands of dicts all holding the same key strings. Seasons nobody registered a schema for are left
+alone.
+
+Fields a schema doesn't list still get kept (see AllianceBreakdown.extra), so nothing gets lost when TBA adds something
+mid-season. Their names are stored once per schema as a shared key layout and each record only holds a tuple of values,
+so unlisted keys don't cost a dict per record either.
+"""
+import array
+import sys
+from typing import Dict, List, Optional
+
+from .models import to_model
+
+_schemas: Dict[int, type] = {}
+
+
+class AllianceBreakdown:
+    """one alliance's half of a score breakdown; subclasses just list annotated fields like a Model"""
+    __slots__ = ("_extra_index", "_extra_values")
+    # tuple of unlisted keys -> {key: position in _extra_values}, shared by every record with the same unlisted keys
+    _layouts: Dict[tuple, Dict[str, int]] = {}
+
+    def __init__(self, data: dict):
+        fields = self.__annotations__
+        extra_keys = []
+        extra_values = []
+        for k, v in data.items():
+            if k in fields:
+                setattr(self, k, to_model(v, fields[k]))
+            else:
+                extra_keys.append(k)
+                # enum-ish strings like "HabLevel3" repeat on every record, only keep one copy of each
+                extra_values.append(sys.intern(v) if type(v) is str and len(v) <= 32 else v)
+        for k in fields:
+            if k not in data:
+                setattr(self, k, None)
+
+        if extra_keys:
+            extra_keys = tuple(extra_keys)
+            index = self._layouts.get(extra_keys)
+            if index is None:
+                index = self._layouts[extra_keys] = {k: i for i, k in enumerate(extra_keys)}
+            self._extra_index = index
+            self._extra_values = tuple(extra_values)
+        else:
+            self._extra_index = None
+            self._extra_values = ()
+
+    @property
+    def extra(self) -> Optional[dict]:
+        """the fields this schema doesn't list, as a fresh dict (None if there weren't any)"""
+        if self._extra_index is None:
+            return None
+        return dict(zip(self._extra_index, self._extra_values))
+
+    def __getitem__(self, key):
+        if key in self.__annotations__:
+            return getattr(self, key)
+        if self._extra_index is not None and key in self._extra_index:
+            return self._extra_values[self._extra_index[key]]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self) -> dict:
+        d = {k: getattr(self, k) for k in self.__annotations__ if getattr(self, k) is not None}
+        if self._extra_index is not None:
+            d.update(zip(self._extra_index, self._extra_values))
+        return d
+
+    def __repr__(self):
+        return f"<{self.__class__.__module__}.{self.__class__.__qualname__}: {getattr(self, 'totalPoints', None)}>"
+
+
+class ScoreBreakdown:
+    __slots__ = ("year", "red", "blue")
+
+    def __init__(self, year: int, red: AllianceBreakdown, blue: AllianceBreakdown):
+        self.year = year
+        self.red = red
+        self.blue = blue
+
+    def __getitem__(self, color):
+        if color not in ("red", "blue"):
+            raise KeyError(color)
+        return getattr(self, color)
+
+    def to_dict(self) -> dict:
+        return {"red": self.red.to_dict(), "blue": self.blue.to_dict()}
+
+    def __repr__(self):
+        return f"<{self.__class__.__module__}.{self.__class__.__qualname__}: {self.year}>"
+
+
+def register(year: int):
+    """class decorator that registers an AllianceBreakdown schema for year, turning its annotations into slots"""
+    def deco(cls):
+        annotations = {}
+        for klass in reversed(cls.__mro__):
+            annotations.update(klass.__dict__.get("__annotations__", {}))
+        slotted = type(cls.__name__, (AllianceBreakdown,), {
+            "__slots__": tuple(k for k in annotations),
+            "__annotations__": annotations,
+            "__module__": cls.__module__,
+            "__qualname__": cls.__qualname__,
+            "__doc__": cls.__doc__,
+            "_layouts": {},
+        })
+        _schemas[year] = slotted
+        return slotted
+    return deco
+
+
+def schema_for(year: int) -> Optional[type]:
+    return _schemas.get(year)
+
+
+def decode(year: int, data):
+    """decodes a raw score_breakdown dict; gives back data untouched if there's no schema for year"""
+    schema = _schemas.get(year)
+    if schema is None or not isinstance(data, dict) or "red" not in data or "blue" not in data:
+        return data
+    return ScoreBreakdown(year, schema(data["red"]), schema(data["blue"]))
+
+
+def compact(matches):
+    """replaces score_breakdown on each match with its typed version, in place. returns matches for convenience"""
+    for match in matches:
+        breakdown = getattr(match, "score_breakdown", None)
+        if isinstance(breakdown, dict):
+            match.score_breakdown = decode(match.key.year, breakdown)
+    return matches
+
+
+def column(matches, color: str, field: str):
+    """
+    Pulls one numeric breakdown component out of every match into a float column (NaN where it's missing), as a numpy
+    array if numpy is around and an array.array otherwise.
+    """
+    values = []
+    for match in matches:
+        breakdown = getattr(match, "score_breakdown", None)
+        value = None
+        if breakdown is not None:
+            alliance = breakdown[color]
+            value = alliance.get(field)
+        values.append(float("nan") if value is None else float(value))
+
+    try:
+        import numpy
+    except ImportError:
+        return array.array("d", values)
+    return numpy.array(values, dtype=numpy.float64)
+
+
+class _Common:
+    # the stuff that shows up basically every year
+    autoPoints: int
+    teleopPoints: int
+    foulPoints: int
+    adjustPoints: int
+    totalPoints: int
+    foulCount: int
+    techFoulCount: int
+    rp: int
+
+
+@register(2019)
+class Breakdown2019(_Common):
+    sandStormBonusPoints: int
+    hatchPanelPoints: int
+    cargoPoints: int
+    habClimbPoints: int
+    completedRocketLeft: bool
+    completedRocketRight: bool
+    completeRocketRankingPoint: bool
+    habDockingRankingPoint: bool
+
+
+@register(2022)
+class Breakdown2022(_Common):
+    taxiPoints: int
+    autoCargoPoints: int
+    teleopCargoPoints: int
+    endgamePoints: int
+    autoCargoTotal: int
+    teleopCargoTotal: int
+    matchCargoTotal: int
+    cargoBonusRankingPoint: bool
+    hangarBonusRankingPoint: bool
+    quintetAchieved: bool
+
+
+@register(2023)
+class Breakdown2023(_Common):
+    autoMobilityPoints: int
+    autoChargeStationPoints: int
+    autoGamePiecePoints: int
+    teleopGamePiecePoints: int
+    endGameChargeStationPoints: int
+    endGameParkPoints: int
+    linkPoints: int
+    activationBonusAchieved: bool
+    sustainabilityBonusAchieved: bool
+    coopertitionCriteriaMet: bool
+
+
+@register(2024)
+class Breakdown2024(_Common):
+    autoLeavePoints: int
+    autoSpeakerNotePoints: int
+    autoAmpNotePoints: int
+    teleopSpeakerNotePoints: int
+    teleopSpeakerNoteAmplifiedPoints: int
+    teleopAmpNotePoints: int
+    endGameParkPoints: int
+    endGameOnStagePoints: int
+    endGameHarmonyPoints: int
+    endGameSpotLightBonusPoints: int
+    endGameNoteInTrapPoints: int
+    melodyBonusAchieved: bool
+    ensembleBonusAchieved: bool
+    coopertitionBonusAchieved: bool
@@ -0,0 +1,206 @@
+"""
+A pub/sub layer over TBASession for live event data.
+
+Instead of every consumer polling TBA on its own, EventBus runs one poller per (event, resource) pair and fans out
+whatever changed to every subscriber through bounded queues. Pollers start with the first subscriber and stop when the
+last one leaves.
+
+    bus = EventBus(session)
+    async with bus.subscribe("2019casj", "matches") as sub:
+        async for update in sub:
+            print(update.changed)
+"""
+import asyncio
+import time
+from typing import Dict, List, Tuple, Any, Optional
+
+import aiohttp
+
+from .http import TBASession, AioTBAError, convert_event_key
+from .models import *
+
+RESOURCES = {
+    "rankings": ("rankings", EventRankings),
+    "matches": ("matches", List[Match]),
+    "alliances": ("alliances", List[EliminationAlliance]),
+    "oprs": ("oprs", EventOPRs),
+}
+
+
+class Update:
+    """
+    A change to a resource at an event.
+
+    data is the whole decoded resource. For matches, changed holds just the Match objects that are new or differ from
+    the last poll; for everything else it's the same as data.
+    """
+    def __init__(self, event_key: str, resource: str, data, changed):
+        self.event_key = event_key
+        self.resource = resource
+        self.data = data
+        self.changed = changed
+
+    def __repr__(self):
+        return f"<{self.__class__.__module__}.{self.__class__.__qualname__}: {self.event_key} {self.resource}>"
+
+
+class SubscriptionClosed(AioTBAError):
+    pass
+
+
+class Subscription:
+    def __init__(self, bus: "EventBus", topic: Tuple[str, str], maxsize: int):
+        self.bus = bus
+        self.topic = topic
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.closed = False
+        # set if the poller feeding us died, so get() can say why
+        self.error: Optional[BaseException] = None
+        self._getters = set()
+
+    async def get(self) -> Update:
+        """waits for the next update; raises SubscriptionClosed once the subscription (or the whole bus) is closed"""
+        if self.closed:
+            raise SubscriptionClosed(f"subscription to {self.topic} is closed") from self.error
+        getter = asyncio.ensure_future(self.queue.get())
+        self._getters.add(getter)
+        try:
+            return await getter
+        except asyncio.CancelledError:
+            # _shutdown cancels whatever we're waiting on; anything else cancelling us should still propagate
+            if self.closed and getter.cancelled():
+                raise SubscriptionClosed(f"subscription to {self.topic} is closed") from self.error
+            raise
+        finally:
+            self._getters.discard(getter)
+
+    def close(self):
+        if not self.closed:
+            self.bus._unsubscribe(self)
+            self._shutdown()
+
+    def _shutdown(self, error: BaseException = None):
+        self.closed = True
+        self.error = error
+        # wake up anybody sitting in get()
+        for getter in self._getters:
+            getter.cancel()
+        # unblock a poller that might be stuck waiting on our full queue
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Update:
+        try:
+            return await self.get()
+        except SubscriptionClosed:
+            if self.error is not None:
+                raise
+            raise StopAsyncIteration from None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class _Poller:
+    def __init__(self, bus: "EventBus", event_key: str, resource: str):
+        self.bus = bus
+        self.event_key = event_key
+        self.resource = resource
+        suffix, self.model = RESOURCES[resource]
+        self.topic = (event_key, resource)
+        self.endpoint = f"/event/{event_key}/{suffix}"
+        self.subscribers: List[Subscription] = []
+        self.last = None
+        self.task: Optional[asyncio.Task] = None
+
+    def next_delay(self) -> float:
+        # follow the response's max-age so we revalidate right when TBA says the data could have changed
+        entry = self.bus.session.cache.get(self.endpoint)
+        if entry is None or entry[0] is None:
+            return self.bus.interval
+        return max(entry[0] - time.time(), self.bus.min_interval)
+
+    def diff(self, data, decoded):
+        if self.resource != "matches":
+            return decoded
+        old = {m["key"]: m for m in self.last} if self.last else {}
+        return to_model([m for m in data if old.get(m["key"]) != m], self.model)
+
+    async def run(self):
+        while True:
+            try:
+                # raw data so we can cheaply tell if anything actually changed; etags are handled by req()
+                data = await self.bus.session.req(self.endpoint, Any)
+            except (AioTBAError, aiohttp.ClientError, asyncio.TimeoutError, OSError):
+                # TBA hiccups and dropped connections happen, just back off and try again
+                await asyncio.sleep(self.bus.min_interval)
+                continue
+
+            if data is not None and data != self.last:
+                decoded = to_model(data, self.model)
+                update = Update(self.event_key, self.resource, decoded, self.diff(data, decoded))
+                self.last = data
+                # bounded queues: a full subscriber holds up the poller (and thus everyone) until it catches up
+                await asyncio.gather(*[sub.queue.put(update) for sub in list(self.subscribers)])
+
+            await asyncio.sleep(self.next_delay())
+
+
+class EventBus:
+    def __init__(self, session: TBASession, interval: float = 60, min_interval: float = 5, maxsize: int = 16):
+        self.session = session
+        self.interval = interval
+        self.min_interval = min_interval
+        self.maxsize = maxsize
+        self.pollers: Dict[Tuple[str, str], _Poller] = {}
+
+    def subscribe(self, event, resource: str, maxsize: int = None) -> Subscription:
+        if resource not in RESOURCES:
+            raise AioTBAError(f"Can't subscribe to {resource!r}, must be one of {', '.join(RESOURCES)}")
+        topic = (convert_event_key(event), resource)
+        sub = Subscription(self, topic, self.maxsize if maxsize is None else maxsize)
+
+        poller = self.pollers.get(topic)
+        if poller is None:
+            poller = self.pollers[topic] = _Poller(self, *topic)
+            poller.task = asyncio.ensure_future(poller.run())
+            poller.task.add_done_callback(lambda task, poller=poller: self._poller_done(poller, task))
+        elif poller.last is not None:
+            # late joiners get the current state straight away instead of waiting for the next change
+            data = to_model(poller.last, poller.model)
+            sub.queue.put_nowait(Update(topic[0], resource, data, data))
+        poller.subscribers.append(sub)
+        return sub
+
+    def _unsubscribe(self, sub: Subscription):
+        poller = self.pollers.get(sub.topic)
+        if poller is None:
+            return
+        if sub in poller.subscribers:
+            poller.subscribers.remove(sub)
+        if not poller.subscribers:
+            poller.task.cancel()
+            del self.pollers[sub.topic]
+
+    def _poller_done(self, poller: _Poller, task: asyncio.Task):
+        # a poller that died on something unexpected shouldn't hang around for new subscribers to wait on forever
+        if self.pollers.get(poller.topic) is poller:
+            del self.pollers[poller.topic]
+        error = None if task.cancelled() else task.exception()
+        for sub in poller.subscribers:
+            sub._shutdown(error)
+
+    async def close(self):
+        tasks = [p.task for p in self.pollers.values()]
+        for p in self.pollers.values():
+            for sub in p.subscribers:
+                sub._shutdown()
+            p.task.cancel()
+        self.pollers.clear()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -127,8 +127,158 @@ class PlayoffType(object):
         BO5_FINALS: "Best of 5 Finals",
     }
 
+    # elim match numbers past this never show up in the mappings below, so the lookup tables stop here and anything
+    # bigger goes through the slow path
+    _TABLE_MAX_MATCH_NUMBER = 48
+    _tables = None
+
+    @classmethod
+    def _get_tables(cls):
+        """builds the reverse lookup tables on first use"""
+        if cls._tables is not None:
+            return cls._tables
+
+        comp_levels = {}  # (playoff_type, match_number) -> comp_level, elims only
+        set_match = {}  # (playoff_type, comp_level, match_number) -> (set, match)
+        for playoff_type in cls.type_names:
+            for match_number in range(1, cls._TABLE_MAX_MATCH_NUMBER + 1):
+                try:
+                    comp_levels[playoff_type, match_number] = cls._compute_comp_level(
+                        playoff_type, 'Playoff', match_number)
+                except (KeyError, TypeError):
+                    # off the end of a mapping, leave it to the slow path so it fails the same way
+                    pass
+                for comp_level in ('qm', 'ef', 'qf', 'sf', 'f'):
+                    try:
+                        set_match[playoff_type, comp_level, match_number] = cls._compute_set_match_number(
+                            playoff_type, comp_level, match_number)
+                    except (KeyError, TypeError):
+                        pass
+
+        double_elim = {}  # (comp_level, set) -> 'winner' / 'loser'
+        for level in ('ef', 'qf', 'sf', 'f'):
+            for set_number in range(1, 9):
+                double_elim[level, set_number] = cls._compute_double_elim_bracket(level, set_number)
+
+        cls._tables = comp_levels, set_match, double_elim
+        return cls._tables
+
     @classmethod
     def get_comp_level(cls, playoff_type, match_level, match_number):
+        if match_level == 'Qualification':
+            return 'qm'
+        level = cls._get_tables()[0].get((playoff_type, match_number))
+        if level is not None:
+            return level
+        return cls._compute_comp_level(playoff_type, match_level, match_number)
+
+    @classmethod
+    def get_set_match_number(cls, playoff_type, comp_level, match_number):
+        res = cls._get_tables()[1].get((playoff_type, comp_level, match_number))
+        if res is not None:
+            return res
+        return cls._compute_set_match_number(playoff_type, comp_level, match_number)
+
+    # Determine if a match is in the winner or loser bracket
+    @classmethod
+    def get_double_elim_bracket(cls, level, set):
+        res = cls._get_tables()[2].get((level, set))
+        if res is not None:
+            return res
+        return cls._compute_double_elim_bracket(level, set)
+
+    @classmethod
+    def map_matches(cls, matches):
+        """
+        Maps (playoff_type, match_level, match_number) rows to (comp_level, set, match) tuples. This is just
+        get_comp_level/get_set_match_number in a loop with the lookups hoisted out; for a whole season's worth see
+        map_match_arrays.
+        """
+        comp_levels, set_match, _ = cls._get_tables()
+        res = []
+        for playoff_type, match_level, match_number in matches:
+            if match_level == 'Qualification':
+                comp_level = 'qm'
+            else:
+                comp_level = comp_levels.get((playoff_type, match_number))
+                if comp_level is None:
+                    comp_level = cls._compute_comp_level(playoff_type, match_level, match_number)
+            sm = set_match.get((playoff_type, comp_level, match_number))
+            if sm is None:
+                sm = cls._compute_set_match_number(playoff_type, comp_level, match_number)
+            res.append((comp_level, sm[0], sm[1]))
+        return res
+
+    # match numbers the dense arrays cover; quals go a lot higher than elims. anything past this takes the slow path
+    _ARRAY_MAX_MATCH_NUMBER = 255
+    _LEVELS = ('qm', 'ef', 'qf', 'sf', 'f')
+    _arrays = None
+
+    @classmethod
+    def _get_arrays(cls, numpy):
+        """
+        dense [is_elim, playoff_type, match_number] -> comp level (index into _LEVELS), set and match arrays for
+        map_match_arrays, built from the same logic as everything else on first use. -1 where there's no answer.
+        """
+        if cls._arrays is not None:
+            return cls._arrays
+
+        shape = (2, max(cls.type_names) + 1, cls._ARRAY_MAX_MATCH_NUMBER + 1)
+        levels = numpy.full(shape, -1, dtype=numpy.int8)
+        sets = numpy.full(shape, -1, dtype=numpy.int16)
+        numbers = numpy.full(shape, -1, dtype=numpy.int16)
+        for elim, match_level in enumerate(('Qualification', 'Playoff')):
+            for playoff_type in cls.type_names:
+                for match_number in range(1, cls._ARRAY_MAX_MATCH_NUMBER + 1):
+                    try:
+                        comp_level = cls._compute_comp_level(playoff_type, match_level, match_number)
+                        set_number, number = cls._compute_set_match_number(playoff_type, comp_level, match_number)
+                    except (KeyError, TypeError):
+                        continue
+                    levels[elim, playoff_type, match_number] = cls._LEVELS.index(comp_level)
+                    sets[elim, playoff_type, match_number] = set_number
+                    numbers[elim, playoff_type, match_number] = number
+
+        cls._arrays = levels, sets, numbers
+        return cls._arrays
+
+    @classmethod
+    def map_match_arrays(cls, playoff_types, match_levels, match_numbers):
+        """
+        Bulk version of map_matches over parallel sequences, for season-wide processing. With numpy around this is a
+        couple of fancy-indexing ops into precomputed arrays and gives back numpy arrays (comp levels as strings, set
+        and match numbers as ints); without it, it falls back to map_matches and gives back a list and two
+        array.arrays. Rows the arrays don't cover go through the normal per-row logic, so they fail the same way.
+        """
+        try:
+            import numpy
+        except ImportError:
+            import array
+            rows = cls.map_matches(zip(playoff_types, match_levels, match_numbers))
+            return [r[0] for r in rows], array.array('l', [r[1] for r in rows]), array.array('l', [r[2] for r in rows])
+
+        levels, sets, numbers = cls._get_arrays(numpy)
+        types = numpy.asarray(playoff_types, dtype=numpy.intp)
+        match_numbers = numpy.asarray(match_numbers, dtype=numpy.intp)
+        elim = (numpy.asarray(match_levels) != 'Qualification').astype(numpy.intp)
+
+        covered = (types >= 0) & (types < levels.shape[1]) & (match_numbers >= 0) & \
+                  (match_numbers < levels.shape[2])
+        # out of range rows index a dummy cell here and get redone below
+        index = (elim, numpy.where(covered, types, 0), numpy.where(covered, match_numbers, 0))
+        level_res = numpy.where(covered, levels[index], -1)
+        set_res = sets[index].astype(numpy.int64)
+        match_res = numbers[index].astype(numpy.int64)
+
+        for i in numpy.flatnonzero(level_res < 0):
+            row = (int(types[i]), 'Playoff' if elim[i] else 'Qualification', int(match_numbers[i]))
+            comp_level, set_res[i], match_res[i] = cls.map_matches([row])[0]
+            level_res[i] = cls._LEVELS.index(comp_level)
+
+        return numpy.array(cls._LEVELS)[level_res], set_res, match_res
+
+    @classmethod
+    def _compute_comp_level(cls, playoff_type, match_level, match_number):
         if match_level == 'Qualification':
             return 'qm'
         else:
@@ -173,7 +323,7 @@ class PlayoffType(object):
             return 'f'
 
     @classmethod
-    def get_set_match_number(cls, playoff_type, comp_level, match_number):
+    def _compute_set_match_number(cls, playoff_type, comp_level, match_number):
         if playoff_type == cls.AVG_SCORE_8_TEAM:
             if comp_level == 'sf':
                 return 1, match_number - 8
@@ -205,9 +355,8 @@ class PlayoffType(object):
             else:  # qm
                 return 1, match_number
 
-    # Determine if a match is in the winner or loser bracket
     @classmethod
-    def get_double_elim_bracket(cls, level, set):
+    def _compute_double_elim_bracket(cls, level, set):
         if level == 'ef':
             return 'winner' if set <= 4 else 'loser'
         elif level == 'qf':
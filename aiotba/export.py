@@ -0,0 +1,215 @@
+"""
+Bulk dump of a whole season: teams, events, matches, rankings and awards.
+
+    python -m aiotba export --year 2024 --format ndjson --out dump/
+
+Fetches run concurrently (bounded) through one TBASession and every record gets written out as soon as its response
+comes back, so nothing holds the whole season in memory. The session uses an on-disk SharedCache under the output
+directory, so rerunning an export that died halfway revalidates what it already has with etags (304s) instead of
+downloading it all again.
+
+Parquet needs pyarrow. Nested fields (alliances, score breakdowns...) get stored as JSON strings there since their shape
+changes from year to year. The schema is worked out from the first couple thousand rows of each file; a later record that
+doesn't fit it (a new column, a float in an int column...) fails the export rather than getting truncated or dropped.
+"""
+import asyncio
+import json
+import os
+from typing import Any, Dict, List
+
+from .http import TBASession, AioTBAError
+from .sharedcache import SharedCache
+
+RESOURCES = ("teams", "events", "matches", "rankings", "awards")
+
+
+class NDJSONWriter:
+    ext = ".ndjson"
+
+    def __init__(self, filename: str):
+        self.file = open(filename, "w")
+
+    def write(self, records: List[dict]):
+        for record in records:
+            self.file.write(json.dumps(record, separators=(",", ":")))
+            self.file.write("\n")
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    ext = ".parquet"
+    # rows held back before the schema gets fixed, so one small batch (say an event with no awards yet) doesn't decide it
+    sample_size = 2000
+
+    def __init__(self, filename: str):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise AioTBAError("parquet export needs pyarrow (pip install pyarrow)") from None
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.filename = filename
+        self.writer = None
+        self.pending: List[dict] = []
+
+    def _flatten(self, record: dict) -> dict:
+        return {k: json.dumps(v) if isinstance(v, (dict, list)) else v for k, v in record.items()}
+
+    def _table(self, rows: List[dict]):
+        # from_pylist only looks at the first row's keys, so go column by column over every key that shows up
+        names = list(dict.fromkeys(k for row in rows for k in row))
+        try:
+            return self.pa.table({k: self.pa.array([row.get(k) for row in rows]) for k in names})
+        except self.pa.ArrowException as e:
+            raise AioTBAError(f"{self.filename}: can't build a parquet table out of these records: {e}") from None
+
+    def _open(self, rows: List[dict]):
+        schema = self._table(rows).schema
+        for i, field in enumerate(schema):
+            # columns that were all null in the sample become strings
+            if self.pa.types.is_null(field.type):
+                schema = schema.set(i, field.with_type(self.pa.string()))
+        self.writer = self.pq.ParquetWriter(self.filename, schema)
+
+    def _conform(self, rows: List[dict]):
+        """fits rows to the file's schema, failing instead of letting arrow truncate or drop anything"""
+        schema = self.writer.schema
+        strings = {f.name for f in schema if self.pa.types.is_string(f.type)}
+        for row in rows:
+            for k in strings:
+                if row.get(k) is not None and not isinstance(row[k], str):
+                    row[k] = json.dumps(row[k])
+
+        table = self._table(rows)
+        # a new column that's all null loses nothing, anything else would get dropped
+        unknown = [name for name in table.column_names
+                   if name not in schema.names and table.column(name).null_count < len(rows)]
+        if unknown:
+            raise AioTBAError(f"{self.filename}: {', '.join(unknown)} showed up after the schema was already written")
+        columns = []
+        for field in schema:
+            if field.name not in table.column_names:
+                columns.append(self.pa.nulls(len(rows), field.type))
+                continue
+            try:
+                # safe casts only widen, e.g. a 2.5 in an int64 column fails here instead of quietly becoming 2
+                columns.append(table.column(field.name).cast(field.type, safe=True))
+            except self.pa.ArrowException as e:
+                raise AioTBAError(f"{self.filename}: {field.name} doesn't fit its {field.type} column: {e}") from None
+        return self.pa.table(columns, schema=schema)
+
+    def write(self, records: List[dict]):
+        rows = [self._flatten(r) for r in records]
+        if self.writer is None:
+            self.pending.extend(rows)
+            if len(self.pending) < self.sample_size:
+                return
+            rows, self.pending = self.pending, []
+            self._open(rows)
+        if rows:
+            self.writer.write_table(self._conform(rows))
+
+    def close(self):
+        try:
+            if self.writer is None and self.pending:
+                rows, self.pending = self.pending, []
+                self._open(rows)
+                self.writer.write_table(self._conform(rows))
+        finally:
+            if self.writer is not None:
+                self.writer.close()
+
+
+WRITERS = {"ndjson": NDJSONWriter, "parquet": ParquetWriter}
+
+
+class Exporter:
+    def __init__(self, session: TBASession, year: int, out: str, fmt: str = "ndjson", concurrency: int = 8,
+                 resources=RESOURCES):
+        self.session = session
+        self.year = year
+        self.out = out
+        self.writer_cls = WRITERS[fmt]
+        self.sem = asyncio.Semaphore(concurrency)
+        self.resources = set(resources)
+        self.writers: Dict[str, Any] = {}
+        self.counts: Dict[str, int] = {}
+
+    def emit(self, resource: str, records: List[dict]):
+        if resource not in self.resources:
+            return
+        if resource not in self.writers:
+            filename = os.path.join(self.out, f"{resource}_{self.year}{self.writer_cls.ext}")
+            self.writers[resource] = self.writer_cls(filename)
+        self.writers[resource].write(records)
+        self.counts[resource] = self.counts.get(resource, 0) + len(records)
+
+    async def fetch(self, endpoint: str, default=None, missing_ok=False):
+        """missing_ok turns a 404 into default; everything else (bad key, TBA being down...) fails the export"""
+        async with self.sem:
+            try:
+                return await self.session.req(endpoint, Any)
+            except AioTBAError as e:
+                if missing_ok and e.status == 404:
+                    # e.g. rankings for an event that never had quals
+                    return default
+                raise
+
+    async def export_teams(self):
+        page = 0
+        while True:
+            teams = await self.fetch(f"/teams/{self.year}/{page}")
+            if not teams:
+                break
+            self.emit("teams", teams)
+            page += 1
+
+    async def export_event(self, event_key: str):
+        async def matches():
+            self.emit("matches", await self.fetch(f"/event/{event_key}/matches", missing_ok=True) or [])
+
+        async def rankings():
+            data = await self.fetch(f"/event/{event_key}/rankings", missing_ok=True)
+            if data and data.get("rankings"):
+                self.emit("rankings", [dict(r, event_key=event_key) for r in data["rankings"]])
+
+        async def awards():
+            self.emit("awards", await self.fetch(f"/event/{event_key}/awards", missing_ok=True) or [])
+
+        wanted = {"matches": matches, "rankings": rankings, "awards": awards}
+        await asyncio.gather(*[f() for name, f in wanted.items() if name in self.resources])
+
+    async def run(self) -> Dict[str, int]:
+        os.makedirs(self.out, exist_ok=True)
+        try:
+            events = await self.fetch(f"/events/{self.year}")
+            self.emit("events", events)
+            jobs = [asyncio.ensure_future(self.export_event(e["key"])) for e in events]
+            if "teams" in self.resources:
+                jobs.append(asyncio.ensure_future(self.export_teams()))
+            try:
+                await asyncio.gather(*jobs)
+            except BaseException:
+                # one job failing sinks the export, don't leave the rest running against a closing session
+                for job in jobs:
+                    job.cancel()
+                await asyncio.gather(*jobs, return_exceptions=True)
+                raise
+        finally:
+            for writer in self.writers.values():
+                writer.close()
+        return self.counts
+
+
+async def export(key: str, year: int, out: str, fmt: str = "ndjson", concurrency: int = 8, resources=RESOURCES,
+                 cache_dir: str = None) -> Dict[str, int]:
+    cache = SharedCache(cache_dir or os.path.join(out, ".aiotba-cache"))
+    # nothing gets evicted; stale entries are exactly what make a rerun cheap
+    session = TBASession(key, cache=cache, max_cache=float("inf"))
+    try:
+        return await Exporter(session, year, out, fmt, concurrency, resources).run()
+    finally:
+        await session.close()
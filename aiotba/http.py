@@ -1,25 +1,35 @@
-import aiohttp
+import itertools
+import os
 import time
+from collections.abc import MutableMapping
+from typing import Optional
 
 from .models import *
+from .index import CacheIndex
 
 
 def convert_team_key(value):
     if isinstance(value, TeamSimple):
-        return value.key
-    value = str(value)
-    if value.startswith("frc"):
-        return value
-    else:
-        return "frc" + value
+        value = value.key
+    return TeamKey(value)
 
 
 def convert_key(value):
+    if isinstance(value, str):
+        return value
     if hasattr(value, "key"):
         return value.key
     return str(value)
 
 
+def convert_event_key(value) -> EventKey:
+    return EventKey(convert_key(value))
+
+
+def convert_match_key(value) -> MatchKey:
+    return MatchKey(convert_key(value))
+
+
 def _get_expire_time(v):
     for k in v.split(","):
         k = k.strip()
@@ -28,16 +38,52 @@ def _get_expire_time(v):
 
 
 class AioTBAError(Exception):
-    pass
+    def __init__(self, *args, status: int = None):
+        super().__init__(*args)
+        # the http status, for errors that came from a response
+        self.status = status
+
+
+_accept_encoding = None
+
+# every store() tags its entry with one of these, so anything derived from an entry (the index) can tell it got rewritten
+# even when the expiry and etag stayed the same, which is what webhook patches do. the prefix keeps other processes
+# sharing the cache from handing out the same ones
+_store_prefix = os.urandom(4).hex()
+_store_ids = itertools.count()
+
+
+def _get_accept_encoding():
+    # worked out on the first request rather than at import, brotli's not free to import
+    global _accept_encoding
+    if _accept_encoding is None:
+        try:
+            import brotli  # aiohttp only decodes br if this is around
+            _accept_encoding = "gzip, deflate, br"
+        except ImportError:
+            _accept_encoding = "gzip, deflate"
+    return _accept_encoding
 
 
 class TBASession:
-    def __init__(self, key: str, aiohttp_session=None, cache=True, max_cache=500):
+    def __init__(self, key: str, aiohttp_session=None, cache=True, max_cache=500, index=False, compress_cache=False,
+                 intern=False):
         self.key = key
-        self.cache_enabled = cache
-        self.cache = {}
+        # cache can also be a mapping to use as the cache, e.g. a SharedCache
+        self.cache_enabled = cache is not None and cache is not False
+        self.cache = cache if isinstance(cache, MutableMapping) else {}
         self.max_cache = max_cache
-        self.session = aiohttp.ClientSession() if not aiohttp_session else aiohttp_session
+        # store cached bodies as zlib'd json instead of dicts; smaller, but every cache hit pays to inflate them again
+        self.compress_cache = compress_cache
+        # share repeated strings and small identical models between everything this session decodes
+        self.interner = Interner() if intern else None
+        # the index answers derived queries out of the cache, so it's useless without one
+        self.index = CacheIndex() if (index and self.cache_enabled) else None
+        if not aiohttp_session:
+            # aiohttp is slow to import, so it only gets pulled in once a session actually needs it
+            import aiohttp
+            aiohttp_session = aiohttp.ClientSession()
+        self.session = aiohttp_session
 
     async def __aenter__(self):
         pass
@@ -48,28 +94,96 @@ class TBASession:
     def prune_cache(self):
         if not self.cache_enabled:
             return
+        # caches that know how to prune themselves cheaper than reading every entry (e.g. SharedCache) get to
+        prune = getattr(self.cache, "prune", None)
+        if prune is not None:
+            prune(time.time())
+            return
         kill = []
-        for endpoint, (exp_time, etag, data) in self.cache.items():
-            if exp_time < time.time():
+        for endpoint, entry in list(self.cache.items()):
+            if entry[0] is None or entry[0] < time.time():
                 kill.append(endpoint)
         for k in kill:
-            del self.cache[k]
+            self.cache.pop(k, None)
+            if self.index is not None:
+                self.index.drop(k)
+
+    def _pack(self, data):
+        if not self.compress_cache:
+            return data
+        import json, zlib
+        return zlib.compress(json.dumps(data, separators=(",", ":")).encode())
+
+    @staticmethod
+    def _unpack(body):
+        if isinstance(body, bytes):
+            import json, zlib
+            return json.loads(zlib.decompress(body))
+        return body
+
+    def cached_body(self, endpoint: str):
+        """the raw cached response for endpoint regardless of freshness, or None"""
+        entry = self.cache.get(endpoint)
+        return self._unpack(entry[2]) if entry is not None else None
+
+    def store(self, endpoint: str, exp_time, etag, data):
+        """caches data as a (expiry, etag, body, write id) entry"""
+        write_id = f"{_store_prefix}-{next(_store_ids)}"
+        self.cache[endpoint] = (exp_time, etag, self._pack(data), write_id)
+        if self.index is not None:
+            self.index.feed(endpoint, data, write_id)
+
+    def _indexed(self, kind: str, event_key: str) -> Optional[CacheIndex]:
+        """the index, caught up with the cached parent endpoint, or None if that isn't fresh"""
+        if self.index is None:
+            return None
+        endpoint = CacheIndex.parent_endpoint(kind, event_key)
+        entry = self.cache.get(endpoint)
+        if entry is None or entry[0] is None or time.time() >= entry[0]:
+            return None
+        version = entry[3] if len(entry) > 3 else None
+        if version is None or self.index.version(endpoint) != version:
+            # the entry changed under us since we indexed it, e.g. another process sharing the cache refreshed it
+            self.index.feed(endpoint, self._unpack(entry[2]), version)
+        return self.index
+
+    def is_fresh(self, endpoint: str) -> bool:
+        """whether endpoint is cached and hasn't hit its max-age yet"""
+        entry = self.cache.get(endpoint)
+        return entry is not None and entry[0] is not None and time.time() < entry[0]
 
     async def close(self):
         await self.session.close()
 
-    async def req(self, endpoint: str, model):
+    async def req(self, endpoint: str, model, fields=None):
         if not endpoint.startswith("/"):
             endpoint = "/" + endpoint
-        data = None
 
-        headers = {"X-TBA-Auth-Key": self.key}
-        if endpoint in self.cache: # wont fire if cache not enabled as cache will be stuck empty
-            exp_time, etag, data = self.cache[endpoint]
-            headers["If-None-Match"] = etag
-            if time.time() < exp_time:
-                return to_model(data, model)
+        entry = self.cache.get(endpoint)  # wont fire if cache not enabled as cache will be stuck empty
+        if entry is not None and entry[0] is not None and time.time() < entry[0]:
+            return to_model(self._unpack(entry[2]), model, fields, self.interner)
+
+        # caches shared between processes hand out a lock so only one of them refreshes a given endpoint at a time
+        lock = getattr(self.cache, "lock", None)
+        if lock is None:
+            data = await self._fetch(endpoint)
+        else:
+            async with lock(endpoint):
+                entry = self.cache.get(endpoint)
+                if entry is not None and entry[0] is not None and time.time() < entry[0]:
+                    # whoever had the lock before us already refreshed it
+                    data = self._unpack(entry[2])
+                else:
+                    data = await self._fetch(endpoint)
+        return to_model(data, model, fields, self.interner)
+
+    async def _fetch(self, endpoint: str):
+        data = None
+        headers = {"X-TBA-Auth-Key": self.key, "Accept-Encoding": _get_accept_encoding()}
+        entry = self.cache.get(endpoint)
+        if entry is not None:
             # if the cached entry is stale then we don't bother deleting because it's about to update
+            headers["If-None-Match"] = entry[1]
 
         response = await self.session.get("https://www.thebluealliance.com/api/v3" + endpoint, headers=headers)
         async with response:
@@ -78,28 +192,36 @@ class TBASession:
                 if self.cache_enabled:
                     if len(self.cache) > self.max_cache:
                         self.prune_cache()
-                    self.cache[endpoint] = (_get_expire_time(response.headers["Cache-Control"]), response.headers['ETag'], data)
+                    self.store(endpoint, _get_expire_time(response.headers["Cache-Control"]), response.headers['ETag'], data)
 
             elif response.status == 304:
-                # cache oddity, probably some race condition or dsynched clocks or something stupid
-                pass
+                # still good, just bump the expiry so we don't revalidate on every single call after this
+                if entry is not None:
+                    data = self._unpack(entry[2])
+                    if "Cache-Control" in response.headers:
+                        # same body, so it keeps its write id and the index stays valid
+                        self.cache[endpoint] = (_get_expire_time(response.headers["Cache-Control"]),) + tuple(entry[1:])
             else:
-                raise AioTBAError(f"Request to {endpoint} failed with {response.status} {response.reason}")
+                raise AioTBAError(f"Request to {endpoint} failed with {response.status} {response.reason}",
+                                  status=response.status)
 
-            return to_model(data, model)
+            return data
 
     async def status(self) -> APIStatus:
         return await self.req('/status', APIStatus)
 
-    async def teams(self, page=None, year=None, keys_only=False) -> Union[List[Team], List[str]]:
+    async def teams(self, page=None, year=None, keys_only=False, simple=False, fields=None) \
+            -> Union[List[Team], List[TeamSimple], List[str]]:
         base = "/teams"
         if year:
             base += f"/{year}"
 
         if keys_only:
             get_page = lambda n: self.req(base + f"/{n}/keys", List[str])
+        elif simple:
+            get_page = lambda n: self.req(base + f"/{n}/simple", List[TeamSimple], fields=fields)
         else:
-            get_page = lambda n: self.req(base + f"/{n}", List[Team])
+            get_page = lambda n: self.req(base + f"/{n}", List[Team], fields=fields)
 
         if page is not None:
             return await get_page(page)
@@ -112,69 +234,88 @@ class TBASession:
                 res += page
             return res
 
-    async def team(self, team) -> Team:
+    async def team(self, team, simple=False) -> Union[Team, TeamSimple]:
         team_key = convert_team_key(team)
+        if simple:
+            return await self.req(f"/team/{team_key}/simple", TeamSimple)
         return await self.req(f"/team/{team_key}", Team)
 
     async def team_years_participated(self, team) -> List[int]:
         team_key = convert_team_key(team)
         return await self.req(f"/team/{team_key}/years_participated", List[int])
 
-    async def team_districts(self, team) -> List[District]:
+    async def team_districts(self, team, fields=None) -> List[District]:
         team_key = convert_team_key(team)
-        return await self.req(f"/team/{team_key}/districts", List[District])
+        return await self.req(f"/team/{team_key}/districts", List[District], fields=fields)
 
-    async def team_robots(self, team) -> List[TeamRobot]:
+    async def team_robots(self, team, fields=None) -> List[TeamRobot]:
         team_key = convert_team_key(team)
-        return await self.req(f"/team/{team_key}/robots", List[TeamRobot])
+        return await self.req(f"/team/{team_key}/robots", List[TeamRobot], fields=fields)
 
-    async def team_events(self, team, year=None, keys_only=False) -> Union[List[Event], List[str]]:
+    async def team_events(self, team, year=None, keys_only=False, simple=False, fields=None) \
+            -> Union[List[Event], List[EventSimple], List[str]]:
         team_key = convert_team_key(team)
         base = f"/team/{team_key}/events"
         if year is not None:
             base += f"/{year}"
         if keys_only:
             return await self.req(base + "/keys", List[str])
+        elif simple:
+            return await self.req(base + "/simple", List[EventSimple], fields=fields)
         else:
-            return await self.req(base, List[Event])
+            return await self.req(base, List[Event], fields=fields)
 
     async def team_event_statuses(self, team, year) -> Dict[str, TeamEventStatus]:
         team_key = convert_team_key(team)
         return await self.req(f"/team/{team_key}/events/{year}/statuses", Dict[str, TeamEventStatus])
 
-    async def team_event_matches(self, team, event, keys_only=False) -> Union[List[Match], List[str]]:
+    async def team_event_matches(self, team, event, keys_only=False, simple=False, fields=None) \
+            -> Union[List[Match], List[MatchSimple], List[str]]:
         team_key = convert_team_key(team)
-        event_key = convert_key(event)
+        event_key = convert_event_key(event)
+        index = self._indexed("matches", event_key)
+        if index is not None:
+            local = index.team_event_matches(team_key, event_key)
+            if local is not None:
+                if keys_only:
+                    return [m["key"] for m in local]
+                # full match data decodes just fine as a MatchSimple
+                return to_model(local, List[MatchSimple] if simple else List[Match], fields, self.interner)
         if keys_only:
             return await self.req(f"/team/{team_key}/event/{event_key}/matches/keys", List[str])
+        elif simple:
+            return await self.req(f"/team/{team_key}/event/{event_key}/matches/simple", List[MatchSimple], fields=fields)
         else:
-            return await self.req(f"/team/{team_key}/event/{event_key}/matches", List[Match])
+            return await self.req(f"/team/{team_key}/event/{event_key}/matches", List[Match], fields=fields)
 
-    async def team_event_awards(self, team, event) -> List[Award]:
+    async def team_event_awards(self, team, event, fields=None) -> List[Award]:
         team_key = convert_team_key(team)
-        event_key = convert_key(event)
-        return await self.req(f"/team/{team_key}/event/{event_key}/awards", List[Award])
+        event_key = convert_event_key(event)
+        return await self.req(f"/team/{team_key}/event/{event_key}/awards", List[Award], fields=fields)
 
     async def team_event_status(self, team, event) -> TeamEventStatus:
         team_key = convert_team_key(team)
-        event_key = convert_key(event)
+        event_key = convert_event_key(event)
         return await self.req(f"/team/{team_key}/event/{event_key}/status", TeamEventStatus)
 
-    async def team_awards(self, team, year=None) -> List[Award]:
+    async def team_awards(self, team, year=None, fields=None) -> List[Award]:
         team_key = convert_team_key(team)
         base = f"/team/{team_key}/awards"
         if year is not None:
             base += f"/{year}"
-        return await self.req(base, List[Award])
+        return await self.req(base, List[Award], fields=fields)
 
-    async def team_matches(self, team, year, keys_only=False) -> Union[List[Match], List[str]]:
+    async def team_matches(self, team, year, keys_only=False, simple=False, fields=None) \
+            -> Union[List[Match], List[MatchSimple], List[str]]:
         team_key = convert_team_key(team)
         if keys_only:
             return await self.req(f"/team/{team_key}/matches/{year}/keys", List[str])
+        elif simple:
+            return await self.req(f"/team/{team_key}/matches/{year}/simple", List[MatchSimple], fields=fields)
         else:
-            return await self.req(f"/team/{team_key}/matches/{year}", List[Match])
+            return await self.req(f"/team/{team_key}/matches/{year}", List[Match], fields=fields)
 
-    async def team_media(self, team, year=None, tag=None) -> List[Media]:
+    async def team_media(self, team, year=None, tag=None, fields=None) -> List[Media]:
         team_key = convert_team_key(team)
         base = f"/team/{team_key}/media"
         if not (year or tag):
@@ -183,99 +324,123 @@ class TBASession:
             base += f"/tag/{tag}"
         if year is not None:
             base += f"/{year}"
-        return await self.req(base, List[Media])
+        return await self.req(base, List[Media], fields=fields)
 
-    async def team_social_media(self, team) -> List[Media]:
+    async def team_social_media(self, team, fields=None) -> List[Media]:
         team_key = convert_team_key(team)
-        return await self.req(f"/team/{team_key}/social_media", List[Media])
+        return await self.req(f"/team/{team_key}/social_media", List[Media], fields=fields)
 
     # /event/ endpoints
-    async def events(self, year, keys_only=False) -> Union[List[Event], List[str]]:
+    async def events(self, year, keys_only=False, simple=False, fields=None) \
+            -> Union[List[Event], List[EventSimple], List[str]]:
         if keys_only:
             return await self.req(f"/events/{year}/keys", List[str])
+        elif simple:
+            return await self.req(f"/events/{year}/simple", List[EventSimple], fields=fields)
         else:
-            return await self.req(f"/events/{year}", List[Event])
+            return await self.req(f"/events/{year}", List[Event], fields=fields)
 
-    async def event(self, event_key) -> Event:
-        event_key = convert_key(event_key)
+    async def event(self, event_key, simple=False) -> Union[Event, EventSimple]:
+        event_key = convert_event_key(event_key)
+        if simple:
+            return await self.req(f"/event/{event_key}/simple", EventSimple)
         return await self.req(f"/event/{event_key}", Event)
 
-    async def event_alliances(self, event) -> List[EliminationAlliance]:
-        event_key = convert_key(event)
-        return await self.req(f"/event/{event_key}/alliances", List[EliminationAlliance])
+    async def event_alliances(self, event, fields=None) -> List[EliminationAlliance]:
+        event_key = convert_event_key(event)
+        return await self.req(f"/event/{event_key}/alliances", List[EliminationAlliance], fields=fields)
 
     async def event_insights(self, event) -> EventInsights:
-        event_key = convert_key(event)
+        event_key = convert_event_key(event)
         return await self.req(f"/event/{event_key}/insights", EventInsights)
 
     async def event_oprs(self, event) -> EventOPRs:
-        event_key = convert_key(event)
+        event_key = convert_event_key(event)
         return await self.req(f"/event/{event_key}/oprs", EventOPRs)
 
     async def event_predictions(self, event) -> EventPredictions:
-        event_key = convert_key(event)
+        event_key = convert_event_key(event)
         return await self.req(f"/event/{event_key}/predictions", EventPredictions)
 
     async def event_rankings(self, event) -> EventRankings:
-        event_key = convert_key(event)
+        event_key = convert_event_key(event)
         return await self.req(f"/event/{event_key}/rankings", EventRankings)
 
     async def event_district_points(self, event) -> EventDistrictPoints:
-        event_key = convert_key(event)
+        event_key = convert_event_key(event)
         return await self.req(f"/event/{event_key}/district_points", EventDistrictPoints)
 
-    async def event_teams(self, event, keys_only=False) -> Union[List[Team], List[str]]:
-        event_key = convert_key(event)
+    async def event_teams(self, event, keys_only=False, simple=False, fields=None) \
+            -> Union[List[Team], List[TeamSimple], List[str]]:
+        event_key = convert_event_key(event)
+        index = self._indexed("teams", event_key) if keys_only else None
+        if index is not None:
+            local = index.event_team_keys_for(event_key)
+            if local is not None:
+                return local
         if keys_only:
             return await self.req(f"/event/{event_key}/teams/keys", List[str])
+        elif simple:
+            return await self.req(f"/event/{event_key}/teams/simple", List[TeamSimple], fields=fields)
         else:
-            return await self.req(f"/event/{event_key}/teams", List[Team])
+            return await self.req(f"/event/{event_key}/teams", List[Team], fields=fields)
 
     async def event_teams_statuses(self, event) -> Dict[str, TeamEventStatus]:
-        event_key = convert_key(event)
+        event_key = convert_event_key(event)
         return await self.req(f"/event/{event_key}/teams/statuses", Dict[str, TeamEventStatus])
 
-    async def event_matches(self, event, keys_only=False) -> Union[List[Team], List[str]]:
-        event_key = convert_key(event)
+    async def event_matches(self, event, keys_only=False, simple=False, fields=None) \
+            -> Union[List[Match], List[MatchSimple], List[str]]:
+        event_key = convert_event_key(event)
         if keys_only:
             return await self.req(f"/event/{event_key}/matches/keys", List[str])
+        elif simple:
+            return await self.req(f"/event/{event_key}/matches/simple", List[MatchSimple], fields=fields)
         else:
-            return await self.req(f"/event/{event_key}/matches", List[Team])
+            return await self.req(f"/event/{event_key}/matches", List[Match], fields=fields)
 
     async def event_matches_timeseries(self, event) -> List[str]:
-        event_key = convert_key(event)
+        event_key = convert_event_key(event)
         return await self.req(f"/event/{event_key}/matches/timeseries", List[str])
 
-    async def event_awards(self, event) -> List[Award]:
-        event_key = convert_key(event)
-        return await self.req(f"/event/{event_key}/awards", List[Award])
+    async def event_awards(self, event, fields=None) -> List[Award]:
+        event_key = convert_event_key(event)
+        return await self.req(f"/event/{event_key}/awards", List[Award], fields=fields)
 
     # /match endpoints
-    async def match(self, match) -> Match:
-        match_key = convert_key(match)
+    async def match(self, match, simple=False) -> Union[Match, MatchSimple]:
+        match_key = convert_match_key(match)
+        if simple:
+            return await self.req(f"/match/{match_key}/simple", MatchSimple)
         return await self.req(f"/match/{match_key}", Match)
 
     async def match_timeseries(self, match) -> List[dict]:
-        match_key = convert_key(match)
+        match_key = convert_match_key(match)
         return await self.req(f"/match/{match_key}/timeseries", List[dict])
 
-    async def districts(self, year) -> List[District]:
-        return await self.req(f"/districts/{year}", List[District])
+    async def districts(self, year, fields=None) -> List[District]:
+        return await self.req(f"/districts/{year}", List[District], fields=fields)
 
-    async def district_events(self, district, keys_only=False) -> Union[List[Event], List[str]]:
+    async def district_events(self, district, keys_only=False, simple=False, fields=None) \
+            -> Union[List[Event], List[EventSimple], List[str]]:
         district_key = convert_key(district)
         if keys_only:
             return await self.req(f"/district/{district_key}/events/keys", List[str])
+        elif simple:
+            return await self.req(f"/district/{district_key}/events/simple", List[EventSimple], fields=fields)
         else:
-            return await self.req(f"/district/{district_key}/events", List[Event])
+            return await self.req(f"/district/{district_key}/events", List[Event], fields=fields)
 
-    async def district_teams(self, district, keys_only=False) -> Union[List[Team], List[str]]:
+    async def district_teams(self, district, keys_only=False, simple=False, fields=None) \
+            -> Union[List[Team], List[TeamSimple], List[str]]:
         district_key = convert_key(district)
         if keys_only:
             return await self.req(f"/district/{district_key}/teams/keys", List[str])
+        elif simple:
+            return await self.req(f"/district/{district_key}/teams/simple", List[TeamSimple], fields=fields)
         else:
-            return await self.req(f"/district/{district_key}/teams", List[Team])
+            return await self.req(f"/district/{district_key}/teams", List[Team], fields=fields)
 
-    async def district_rankings(self, district) -> List[DistrictRanking]:
+    async def district_rankings(self, district, fields=None) -> List[DistrictRanking]:
         district_key = convert_key(district)
-        return await self.req(f"/district/{district_key}/rankings", List[DistrictRanking])
+        return await self.req(f"/district/{district_key}/rankings", List[DistrictRanking], fields=fields)
@@ -0,0 +1,74 @@
+"""
+In-memory indexes built off of responses that land in the cache.
+
+A bunch of the team_* endpoints are really just slices of data we already have from event_* endpoints (e.g. a team's
+matches at an event are a filter over the event's match list), so if the parent response is cached and still fresh
+we can answer those locally instead of making another round trip.
+"""
+from typing import Dict, List, Optional
+
+
+def _split(endpoint: str) -> List[str]:
+    return endpoint.strip("/").split("/")
+
+
+class CacheIndex:
+    def __init__(self):
+        # event key -> team key -> list of raw match dicts the team played in
+        self.event_team_matches: Dict[str, Dict[str, List[dict]]] = {}
+        # event key -> list of team keys attending
+        self.event_team_keys: Dict[str, List[str]] = {}
+        # parent endpoint -> write id of the cache entry it was indexed from (see TBASession.store)
+        self.versions: Dict[str, str] = {}
+
+    @staticmethod
+    def parent_endpoint(kind: str, event_key: str) -> str:
+        return f"/event/{event_key}/{kind}"
+
+    def version(self, endpoint: str) -> Optional[str]:
+        return self.versions.get(endpoint)
+
+    def feed(self, endpoint: str, data, version: str = None):
+        """updates the index with a response body; version is the write id of the cache entry it came from"""
+        parts = _split(endpoint)
+        if len(parts) != 3 or parts[0] != "event" or not isinstance(data, list):
+            return
+        event_key = parts[1]
+        self.versions[endpoint] = version
+
+        if parts[2] == "matches":
+            by_team = {}
+            for match in data:
+                for alliance in (match.get("alliances") or {}).values():
+                    for team_key in alliance.get("team_keys") or ():
+                        by_team.setdefault(team_key, []).append(match)
+            self.event_team_matches[event_key] = by_team
+        elif parts[2] == "teams":
+            self.event_team_keys[event_key] = [t["key"] for t in data]
+
+    def drop(self, endpoint: str):
+        """removes whatever was derived from endpoint, used when the cache evicts it"""
+        parts = _split(endpoint)
+        if len(parts) != 3 or parts[0] != "event":
+            return
+        self.versions.pop(endpoint, None)
+        if parts[2] == "matches":
+            self.event_team_matches.pop(parts[1], None)
+        elif parts[2] == "teams":
+            self.event_team_keys.pop(parts[1], None)
+
+    def clear(self):
+        self.event_team_matches.clear()
+        self.event_team_keys.clear()
+        self.versions.clear()
+
+    def team_event_matches(self, team_key: str, event_key: str) -> Optional[List[dict]]:
+        by_team = self.event_team_matches.get(event_key)
+        if by_team is None:
+            return None
+        # a team that's indexed for the event but not in any match just hasn't played yet
+        return list(by_team.get(team_key, ()))
+
+    def event_team_keys_for(self, event_key: str) -> Optional[List[str]]:
+        keys = self.event_team_keys.get(event_key)
+        return list(keys) if keys is not None else None
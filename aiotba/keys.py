@@ -0,0 +1,181 @@
+"""
+Interned key types for teams, events and matches.
+
+These are str subclasses, so they drop in anywhere a key string is expected (endpoint urls, dict keys, comparisons
+against plain strings), but they get parsed exactly once and identical keys share one object. Matches also sort in
+natural match order (qm < ef < qf < sf < f, then by set and match number) instead of lexicographically, so
+sorted(matches, key=lambda m: m.key) does what you'd expect.
+
+Keys don't carry an instance dict (that alone costs several times the string itself); the parsed pieces live in a
+bounded cache keyed by the key, so they get worked out once for anything that's in active use.
+"""
+import functools
+import re
+import weakref
+
+COMP_LEVEL_ORDER = {"qm": 0, "ef": 1, "qf": 2, "sf": 3, "f": 4}
+_COMP_LEVELS = tuple(COMP_LEVEL_ORDER)
+
+# plain strings, re compiles (and caches) them the first time a key actually gets parsed
+_EVENT_RE = r"^(\d{4})([a-z0-9]+)$"
+_MATCH_RE = r"^(\d{4})([a-z0-9]+)_(qm|ef|qf|sf|f)(\d+)(?:m(\d+))?$"
+
+
+class _Key(str):
+    # no __dict__, the only per-key cost on top of the string is being weakref-able for the intern table
+    __slots__ = ("__weakref__",)
+    _interned = None
+
+    def __new__(cls, value):
+        if type(value) is cls:
+            return value
+        value = cls._normalize(str(value))
+        try:
+            return cls._interned[value]
+        except KeyError:
+            pass
+        self = super().__new__(cls, value)
+        self._parsed  # bad keys fail here rather than whenever something first looks at them
+        cls._interned[value] = self
+        return self
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._interned = weakref.WeakValueDictionary()
+
+    @staticmethod
+    def _normalize(value: str) -> str:
+        return value
+
+    @staticmethod
+    def _parse(key):
+        return None
+
+    @property
+    def _parsed(self):
+        return _parse_cached(type(self), self)
+
+    @property
+    def sort_key(self):
+        return str(self)
+
+    # ordering is only special between keys of the same type, otherwise fall back to plain string ordering
+    def __lt__(self, other):
+        if type(other) is type(self):
+            return self.sort_key < other.sort_key
+        return str.__lt__(self, other)
+
+    def __le__(self, other):
+        if type(other) is type(self):
+            return self.sort_key <= other.sort_key
+        return str.__le__(self, other)
+
+    def __gt__(self, other):
+        if type(other) is type(self):
+            return self.sort_key > other.sort_key
+        return str.__gt__(self, other)
+
+    def __ge__(self, other):
+        if type(other) is type(self):
+            return self.sort_key >= other.sort_key
+        return str.__ge__(self, other)
+
+    __hash__ = str.__hash__
+    __eq__ = str.__eq__
+    __ne__ = str.__ne__
+
+    def __reduce__(self):
+        return self.__class__, (str(self),)
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_cached(cls, key):
+    # holds on to the most recently used keys, which is fine, they're tiny now
+    return cls._parse(key)
+
+
+class TeamKey(_Key):
+    """a team key like frc254; also accepts 254 or "254" and adds the prefix"""
+    __slots__ = ()
+
+    @staticmethod
+    def _normalize(value: str) -> str:
+        return value if value.startswith("frc") else "frc" + value
+
+    @staticmethod
+    def _parse(key):
+        # B/C/D teams at offseason events (frc254B) are a thing, so only the leading digits count
+        digits = re.match(r"\d*", key[3:]).group()
+        return int(digits) if digits else 0
+
+    @property
+    def number(self) -> int:
+        return self._parsed
+
+    @property
+    def sort_key(self):
+        return self._parsed, str(self)
+
+
+class EventKey(_Key):
+    """an event key like 2019casj"""
+    __slots__ = ()
+
+    @staticmethod
+    def _parse(key):
+        if not re.match(_EVENT_RE, key):
+            raise ValueError(f"invalid event key {str(key)!r}")
+
+    @property
+    def year(self) -> int:
+        return int(self[:4])
+
+    @property
+    def event_code(self) -> str:
+        return self[4:]
+
+
+class MatchKey(_Key):
+    """a match key like 2019casj_qf2m1 or 2019casj_qm12"""
+    __slots__ = ()
+
+    @staticmethod
+    def _parse(key):
+        m = re.match(_MATCH_RE, key)
+        if not m:
+            raise ValueError(f"invalid match key {str(key)!r}")
+        if m.group(5) is None:
+            # quals don't have sets, the number is the match number
+            set_number, match_number = 1, int(m.group(4))
+        else:
+            set_number, match_number = int(m.group(4)), int(m.group(5))
+        # this is also the sort key
+        return EventKey(m.group(1) + m.group(2)), COMP_LEVEL_ORDER[m.group(3)], set_number, match_number
+
+    @property
+    def event_key(self) -> EventKey:
+        return self._parsed[0]
+
+    @property
+    def comp_level(self) -> str:
+        return _COMP_LEVELS[self._parsed[1]]
+
+    @property
+    def set_number(self) -> int:
+        return self._parsed[2]
+
+    @property
+    def match_number(self) -> int:
+        return self._parsed[3]
+
+    @property
+    def year(self) -> int:
+        return int(self[:4])
+
+    @property
+    def event_code(self) -> str:
+        return self.event_key.event_code
+
+    @property
+    def sort_key(self):
+        return self._parsed
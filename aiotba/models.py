@@ -1,6 +1,9 @@
 import datetime
+import re
 from typing import Dict, Tuple, List, Union, Any
 
+from .keys import TeamKey, EventKey, MatchKey
+
 
 class Converter:
     repr_str = ""
@@ -26,32 +29,97 @@ class HomeChampionship(Converter):
         return {int(k): v for k, v in value.items()} if value else {}
 
 
+class Interner:
+    """
+    Shares repeated strings and identical value-ish models (ones with __shared__ set) between everything decoded with
+    it, so e.g. 60 teams from the same district all point at one District and one "USA". Shared models are, well,
+    shared, so don't go mutating them.
+    """
+    def __init__(self):
+        self.strings: Dict[str, str] = {}
+        self.models: Dict[tuple, "Model"] = {}
+
+    def string(self, value: str) -> str:
+        return self.strings.setdefault(value, value)
+
+    def model(self, model, data):
+        try:
+            key = (model, tuple(sorted(data.items())))
+            return self.models[key]
+        except TypeError:
+            # something unhashable in there, can't share it
+            return model(data, self)
+        except KeyError:
+            res = self.models[key] = model(data, self)
+            return res
+
+    def clear(self):
+        self.strings.clear()
+        self.models.clear()
+
+
 class Model(Converter):
     __prefix__ = ""
+    # whether identical instances can be shared by an Interner
+    __shared__ = False
 
-    def __init__(self, data):
+    def __init__(self, data, interner: Interner = None):
 
         cutoff = len(self.__prefix__)
         # self._data = data
 
-        # base classes annotations should be incorporated into the list of fields
-        fields = dict(self.__annotations__)
-        for base in self.__class__.__bases__:
-            if hasattr(base, "__annotations__"):
-                fields.update(base.__annotations__)
-
-        for field_name, field_type in fields.items():
+        for field_name, field_type in self._field_types().items():
             try:
                 if field_name[cutoff:] in data:
-                    setattr(self, field_name, to_model(data[field_name[cutoff:]], field_type))
+                    setattr(self, field_name, to_model(data[field_name[cutoff:]], field_type, interner=interner))
                 else:
                     setattr(self, field_name, None)
             except TypeError:
                 print(f"REEEEEEE: {field_name}")
                 raise
 
+    @classmethod
+    def _field_types(cls) -> Dict[str, Any]:
+        # base classes annotations should be incorporated into the list of fields. this gets worked out once per class
+        # and stashed on it, rather than on every single decode
+        if "_fields" not in cls.__dict__:
+            fields = {}
+            for klass in reversed(cls.__mro__):
+                fields.update(klass.__dict__.get("__annotations__", {}))
+            cls._fields = fields
+        return cls._fields
+
+    @classmethod
+    def project(cls, fields):
+        """
+        Returns a subclass of this model that only decodes the given fields; everything else is skipped entirely
+        (nested models included) and isn't set on the instance at all.
+        """
+        key = frozenset(fields)
+        projections = cls.__dict__.get("_projections")
+        if projections is None:
+            projections = cls._projections = {}
+        if key in projections:
+            return projections[key]
+
+        all_fields = cls._field_types()
+        unknown = key - all_fields.keys()
+        if unknown:
+            raise ValueError(f"{cls.__name__} has no field(s) {', '.join(sorted(unknown))}")
+
+        # only keep the repr if everything it shows is still around
+        repr_str = cls.repr_str if set(re.findall(r"{s\.(\w+)", cls.repr_str)) <= key else ""
+        projected = type(cls.__name__, (cls,), {
+            "__qualname__": cls.__qualname__,
+            "__module__": cls.__module__,
+            "_fields": {k: v for k, v in all_fields.items() if k in key},
+            "repr_str": repr_str,
+        })
+        projections[key] = projected
+        return projected
+
     def __contains__(self, item):
-        return item in self.__annotations__
+        return item in self._field_types()
 
     def __getitem__(self, key):
         if key not in self:
@@ -124,6 +192,7 @@ class TeamRobot(Model):
 
 
 class District(Model):
+    __shared__ = True
     abbreviation: str
     display_name: str
     key: str
@@ -148,6 +217,7 @@ class EventSimple(Model):
 
 
 class Webcast(Model):
+    __shared__ = True
     type: str
     channel: str
     file: str
@@ -183,6 +253,7 @@ class WLTRecord(Model):
 
 
 class ValueInfo(Model):
+    __shared__ = True
     name: str
     precision: int
 
@@ -286,19 +357,19 @@ class DistrictRanking(Model):
 
 class MatchAlliance(Model):
     score: int
-    team_keys: List[str]
-    surrogate_team_keys: List[str]
-    dq_team_keys: List[str]
+    team_keys: List[TeamKey]
+    surrogate_team_keys: List[TeamKey]
+    dq_team_keys: List[TeamKey]
 
 
 class MatchSimple(Model):
-    key: str
+    key: MatchKey
     comp_level: str
     set_number: int
     match_number: int
     alliances: Dict[str, MatchAlliance]
     winning_alliance: str
-    event_key: str
+    event_key: EventKey
     time: Timestamp(fmt="unix")
     predicted_time: Timestamp(fmt="unix")
     actual_time: Timestamp(fmt="unix")
@@ -343,7 +414,11 @@ class Award(Model):
     year: int
 
 
-def to_model(data, model):
+def to_model(data, model, fields=None, interner: Interner = None):
+    """
+    Converts raw api data into model. fields optionally restricts which fields of the (innermost) model get decoded,
+    see Model.project. interner, if given, dedupes strings and shared models across everything it's used on.
+    """
     if model is Any:
         return data # don't even touch it
 
@@ -353,11 +428,27 @@ def to_model(data, model):
 
         # the in expr is for 3.6 compat REEEEEEEEEEEEEEEE
         if model.__origin__ in (list, List):
-            return [to_model(d, model.__args__[0]) for d in data]
+            item = model.__args__[0]
+            if fields is not None and isinstance(item, type) and issubclass(item, Model):
+                item = item.project(fields)
+            return [to_model(d, item, interner=interner) for d in data]
         elif model.__origin__ in (dict, Dict):
-            return {to_model(k, model.__args__[0]): to_model(v, model.__args__[1]) for k, v in data.items()}
+            key, value = model.__args__
+            if fields is not None and isinstance(value, type) and issubclass(value, Model):
+                value = value.project(fields)
+            return {to_model(k, key, interner=interner): to_model(v, value, interner=interner) for k, v in data.items()}
+
+    if fields is not None and isinstance(model, type) and issubclass(model, Model):
+        model = model.project(fields)
 
     # usually you can just call otherwise lol
     # if the data endpoint is None, chances are calling a model on it will fail, so we can just return None
-    return model(data) if data is not None else None
-
+    if data is None:
+        return None
+    if interner is not None:
+        if model is str:
+            # numbers tba sends for str fields (lat/lng...) still get str()'d like they would without an interner
+            return interner.string(data) if type(data) is str else str(data)
+        if isinstance(model, type) and issubclass(model, Model):
+            return interner.model(model, data) if model.__shared__ else model(data, interner)
+    return model(data)
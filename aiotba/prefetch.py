@@ -0,0 +1,109 @@
+"""
+Keeps the TBASession cache warm for events that are happening right now.
+
+    prefetcher = Prefetcher(session, 2019)
+    prefetcher.start()
+    ...
+    await prefetcher.stop()
+
+Every cycle it works out which events are active off of events(year) (start_date/end_date, give or take a day since
+those are in the event's local time) and refetches whatever endpoints of theirs are no longer fresh. Each endpoint is
+refreshed when its max-age says it's stale, and only so many requests are in flight at once.
+"""
+import asyncio
+import datetime
+import time
+from typing import Iterable, List, Optional
+
+import aiohttp
+
+from .consts import EventType
+from .http import TBASession, AioTBAError
+from .models import *
+
+# what a request can reasonably fail with that's worth just retrying later
+_RETRYABLE = (AioTBAError, aiohttp.ClientError, asyncio.TimeoutError, OSError)
+
+RESOURCES = ("teams", "matches", "rankings", "oprs")
+
+
+class Prefetcher:
+    def __init__(self, session: TBASession, year: int, concurrency: int = 4, resources: Iterable[str] = RESOURCES,
+                 event_types: Iterable[int] = EventType.SEASON_EVENT_TYPES, slack_days: int = 1,
+                 min_interval: float = 10, max_interval: float = 600):
+        self.session = session
+        self.year = year
+        self.concurrency = concurrency
+        self.resources = tuple(resources)
+        self.event_types = set(event_types)
+        self.slack = datetime.timedelta(days=slack_days)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.task: Optional[asyncio.Task] = None
+
+    def active_events(self, events: List[Event], today: datetime.date = None) -> List[Event]:
+        today = today or datetime.date.today()
+        res = []
+        for event in events:
+            if event.event_type not in self.event_types or not event.start_date or not event.end_date:
+                continue
+            if event.start_date.date() - self.slack <= today <= event.end_date.date() + self.slack:
+                res.append(event)
+        return res
+
+    def endpoints(self, events: List[Event]) -> List[str]:
+        return [f"/event/{event.key}/{resource}" for event in events for resource in self.resources]
+
+    async def warm(self, endpoints: List[str]):
+        """fetches every endpoint that isn't fresh in the cache, at most concurrency at a time"""
+        sem = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(endpoint):
+            async with sem:
+                try:
+                    # Any so we don't bother decoding something nobody asked for yet
+                    await self.session.req(endpoint, Any)
+                except _RETRYABLE:
+                    # e.g. no rankings before quals start or a dropped connection, just try again next cycle
+                    pass
+
+        await asyncio.gather(*[fetch(e) for e in endpoints if not self.session.is_fresh(e)])
+
+    def next_delay(self, endpoints: List[str]) -> float:
+        # wake up when the soonest-expiring endpoint goes stale
+        now = time.time()
+        expiries = []
+        for endpoint in endpoints:
+            # one get() rather than in + [], another process sharing the cache can prune it in between
+            entry = self.session.cache.get(endpoint)
+            if entry is not None and entry[0] is not None:
+                expiries.append(entry[0])
+        if not expiries:
+            return self.max_interval
+        return min(max(min(expiries) - now, self.min_interval), self.max_interval)
+
+    async def run_once(self) -> float:
+        """one warm-up pass; returns how long to wait before the next one"""
+        events = await self.session.events(self.year)
+        endpoints = self.endpoints(self.active_events(events))
+        await self.warm(endpoints)
+        return self.next_delay(endpoints)
+
+    async def run(self):
+        while True:
+            try:
+                delay = await self.run_once()
+            except _RETRYABLE:
+                delay = self.min_interval
+            await asyncio.sleep(delay)
+
+    def start(self) -> asyncio.Task:
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self.run())
+        return self.task
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
@@ -0,0 +1,171 @@
+"""
+A cache that several processes on the same host can share.
+
+    cache = SharedCache()
+    ses = TBASession("key", cache=cache)
+
+Entries are the same (expiry, etag, body, write id) tuples TBASession keeps in its dict cache, stored one file per endpoint in a
+directory that defaults to /dev/shm/aiotba-cache-<uid> (so it's all in shared memory on linux). Files are named after
+their (url-quoted) endpoint, so listing the cache never has to open them. Writes go through a temp file and a rename,
+so readers never see half an entry.
+
+Whatever's in the directory gets served as if it came from TBA, so it has to belong to the current user: it gets
+created 0700, and a directory owned by anyone else is refused.
+
+The cache also hands TBASession a per-endpoint lock (flock on a lock file), so when an endpoint goes stale only one
+process actually goes and refreshes it while the others wait and then read what it got. This relies on fcntl, so it's
+unix only.
+"""
+import asyncio
+import base64
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import stat
+import tempfile
+import time
+import urllib.parse
+from collections.abc import MutableMapping
+
+from .http import AioTBAError
+
+
+def _default_path():
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    # per user, otherwise anyone on the host could make the directory first and plant entries in it
+    return os.path.join(base, f"aiotba-cache-{os.getuid()}")
+
+
+def _check_dir(path: str):
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode):
+        raise AioTBAError(f"cache path {path} isn't a directory")
+    if st.st_uid != os.getuid():
+        raise AioTBAError(f"cache directory {path} belongs to uid {st.st_uid}, not us; refusing to use it")
+    if st.st_mode & 0o022:
+        raise AioTBAError(f"cache directory {path} is writable by other users; refusing to use it")
+
+
+class SharedCache(MutableMapping):
+    def __init__(self, path: str = None, poll_interval: float = 0.05, prune_interval: float = 30):
+        self.path = path or _default_path()
+        self.poll_interval = poll_interval
+        self.prune_interval = prune_interval
+        self._last_prune = 0
+        os.makedirs(self.path, mode=0o700, exist_ok=True)
+        _check_dir(self.path)
+
+    def _file(self, endpoint: str, ext: str = ".json") -> str:
+        name = urllib.parse.quote(endpoint, safe="")
+        if len(name) > 200:
+            # way past anything tba has, but filenames top out at 255
+            name = hashlib.sha1(endpoint.encode()).hexdigest()
+        return os.path.join(self.path, name + ext)
+
+    def _read(self, filename: str):
+        try:
+            with open(filename) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def __getitem__(self, endpoint: str):
+        stored = self._read(self._file(endpoint))
+        if stored is None or stored["endpoint"] != endpoint:
+            raise KeyError(endpoint)
+        entry = stored["entry"]
+        if "zbody" in stored:
+            entry[2] = base64.b64decode(stored["zbody"])
+        return tuple(entry)
+
+    def __setitem__(self, endpoint: str, entry):
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            exp_time, body = entry[0], entry[2]
+            stored = {"endpoint": endpoint, "entry": list(entry)}
+            if isinstance(body, bytes):
+                # compressed bodies (TBASession(compress_cache=True)) don't fit in json as-is
+                stored["entry"][2] = None
+                stored["zbody"] = base64.b64encode(body).decode()
+            with os.fdopen(fd, "w") as f:
+                json.dump(stored, f)
+            # the expiry doubles as the file's mtime so prune() can find stale entries with just a stat
+            os.utime(tmp, (exp_time or 0, exp_time or 0))
+            os.replace(tmp, self._file(endpoint))
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(tmp)
+            raise
+
+    def __delitem__(self, endpoint: str):
+        try:
+            os.unlink(self._file(endpoint))
+        except FileNotFoundError:
+            raise KeyError(endpoint) from None
+
+    def __contains__(self, endpoint):
+        return os.path.exists(self._file(endpoint))
+
+    def __iter__(self):
+        for name in os.listdir(self.path):
+            if not name.endswith(".json"):
+                continue
+            if name.startswith("%2F"):
+                yield urllib.parse.unquote(name[:-5])
+            else:
+                # a hashed name, only happens for absurdly long endpoints (or a cache from before names were quoted,
+                # whose entries can't be looked up anymore anyways)
+                stored = self._read(os.path.join(self.path, name))
+                if stored is not None and self._file(stored["endpoint"]).endswith(os.sep + name):
+                    yield stored["endpoint"]
+
+    def __len__(self):
+        return sum(1 for name in os.listdir(self.path) if name.endswith(".json"))
+
+    def clear(self):
+        # lock files stay put, someone might be holding one
+        for name in os.listdir(self.path):
+            if not name.endswith(".json"):
+                continue
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(os.path.join(self.path, name))
+
+    def prune(self, now: float = None):
+        """
+        Deletes expired entries. Only stats files (expiry is stored as the mtime), skips anything another process got
+        to first, and does nothing if it already ran in the last prune_interval seconds.
+        """
+        now = time.time() if now is None else now
+        if now - self._last_prune < self.prune_interval:
+            return
+        self._last_prune = now
+        for name in os.listdir(self.path):
+            if not name.endswith(".json"):
+                continue
+            filename = os.path.join(self.path, name)
+            try:
+                if os.stat(filename).st_mtime < now:
+                    os.unlink(filename)
+            except FileNotFoundError:
+                pass
+
+    @contextlib.asynccontextmanager
+    async def lock(self, endpoint: str):
+        """holds an exclusive lock on endpoint across every process using this cache"""
+        fd = os.open(self._file(endpoint, ".lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    # don't block the event loop waiting on another process
+                    await asyncio.sleep(self.poll_interval)
+            try:
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
@@ -0,0 +1,83 @@
+"""
+A synchronous wrapper around TBASession for code that isn't async (scripts, notebooks, celery tasks...).
+
+    with TBAClient("tba apiv3 key here") as tba:
+        print(tba.team(254).nickname)
+
+One TBASession lives on an event loop running in a background thread, and every endpoint method gets forwarded to it
+and waited on, so all calls share the same connection pool and cache instead of paying for a fresh aiohttp session
+(and TLS handshake) each time like asyncio.run() per call would.
+"""
+import asyncio
+import concurrent.futures
+import functools
+import inspect
+import threading
+
+from .http import TBASession
+
+
+class TBAClient:
+    def __init__(self, key: str, timeout: float = None, **kwargs):
+        """kwargs get passed to TBASession"""
+        self.timeout = timeout
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="aiotba", daemon=True)
+        self.thread.start()
+
+        # the aiohttp session has to get made on the loop it's going to be used from
+        async def make():
+            return TBASession(key, **kwargs)
+        try:
+            self.session = self._run(make())
+        except BaseException:
+            # nobody's going to call close() on a half made client, don't leave the thread running
+            self._stop_loop()
+            raise
+
+    def _run(self, coro):
+        if self.loop.is_closed():
+            coro.close()
+            raise RuntimeError("TBAClient is closed")
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(self.timeout)
+        except concurrent.futures.TimeoutError:
+            # otherwise the request keeps going on the loop thread with nobody waiting for it
+            future.cancel()
+            raise
+
+    def _stop_loop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    def __getattr__(self, name):
+        # only gets hit for things that aren't on TBAClient itself, i.e. the endpoint methods
+        if name == "session":
+            raise AttributeError(name)
+        attr = getattr(self.session, name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def wrapper(*args, **kwargs):
+            return self._run(attr(*args, **kwargs))
+        return wrapper
+
+    def __dir__(self):
+        return sorted(set(super().__dir__()) | set(dir(self.session)))
+
+    def close(self):
+        if self.loop.is_closed():
+            return
+        try:
+            self._run(self.session.close())
+        finally:
+            self._stop_loop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
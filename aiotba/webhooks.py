@@ -0,0 +1,146 @@
+"""
+Receiver for TBA's push webhooks, so the cache gets fresh data without anybody polling for it.
+
+    receiver = WebhookReceiver(session, "webhook secret")
+    receiver.add_handler("match_score", on_score)  # async def on_score(match: Match)
+    web.run_app(receiver.app())
+
+Incoming payloads are checked against the X-TBA-HMAC header, then written into (or knocked out of) session.cache so the
+next req() for that endpoint sees the new data. Handlers get the payload converted into the usual models.
+"""
+import hashlib
+import hmac
+import json
+from typing import Callable, Dict, List
+
+import aiohttp
+from aiohttp import web
+
+from .http import TBASession
+from .models import *
+
+# things that get recomputed by TBA whenever a match is scored; these just get dropped from the cache
+_MATCH_DERIVED = ("rankings", "oprs", "predictions", "insights", "teams/statuses", "district_points")
+
+
+def sign(secret: str, body: bytes) -> str:
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+class WebhookReceiver:
+    def __init__(self, session: TBASession, secret: str, path: str = "/tba"):
+        self.session = session
+        self.secret = secret
+        self.path = path
+        self.handlers: Dict[str, List[Callable]] = {}
+
+    def add_handler(self, message_type: str, handler: Callable):
+        """
+        handler is a coroutine function called with the message data: a Match for match_score, an Event for
+        alliance_selection, and the raw dict for everything else (upcoming_match etc. have no model to go in)
+        """
+        self.handlers.setdefault(message_type, []).append(handler)
+
+    def remove_handler(self, message_type: str, handler: Callable):
+        self.handlers.get(message_type, []).remove(handler)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self.path, self.handle)
+        return app
+
+    def verify(self, body: bytes, signature: str) -> bool:
+        return hmac.compare_digest(sign(self.secret, body), signature or "")
+
+    async def handle(self, request: web.Request) -> web.Response:
+        body = await request.read()
+        if not self.verify(body, request.headers.get("X-TBA-HMAC")):
+            return web.Response(status=401, text="bad hmac")
+        try:
+            payload = json.loads(body)
+            message_type = payload["message_type"]
+            data = payload.get("message_data") or {}
+            decoded = self.ingest(message_type, data)
+        except (ValueError, KeyError, TypeError):
+            # signed fine but not shaped like anything TBA sends
+            return web.Response(status=400, text="bad payload")
+
+        for handler in self.handlers.get(message_type, ()):
+            await handler(decoded)
+        return web.Response(status=200)
+
+    def ingest(self, message_type: str, data: dict):
+        """applies a webhook payload to the session cache and returns it decoded (see add_handler)"""
+        if message_type == "match_score":
+            match = data["match"]
+            self.update_match(match)
+            return to_model(match, Match)
+        elif message_type == "upcoming_match":
+            # only the schedule moved, which lives in the match list
+            self.invalidate(f"/event/{data['event_key']}/matches")
+            self.invalidate(f"/event/{data['event_key']}/matches/simple")
+            self.invalidate(f"/match/{data['match_key']}")
+            self.invalidate(f"/match/{data['match_key']}/simple")
+            return data
+        elif message_type == "alliance_selection":
+            event = data.get("event")
+            event_key = data.get("event_key") or event["key"]
+            self.invalidate(f"/event/{event_key}/alliances")
+            self.invalidate(f"/event/{event_key}/teams/statuses")
+            # each team's status at the event has its alliance_status_str in it too
+            team_status = f"/event/{event_key}/status"
+            for endpoint in [e for e in self.session.cache if e.startswith("/team/") and e.endswith(team_status)]:
+                self.invalidate(endpoint)
+            return to_model(event, Event) if event else data
+        return data
+
+    def invalidate(self, endpoint: str):
+        if self.session.cache.pop(endpoint, None) is not None and self.session.index is not None:
+            self.session.index.drop(endpoint)
+
+    def _patch(self, endpoint: str, data):
+        exp_time, etag = self.session.cache[endpoint][:2]
+        # keep the old etag: if TBA has caught up it'll hand us a 200 with a new one anyways
+        self.session.store(endpoint, exp_time, etag, data)
+
+    def update_match(self, match: dict):
+        match_key = match["key"]
+        event_key = match["event_key"]
+
+        if f"/match/{match_key}" in self.session.cache:
+            self._patch(f"/match/{match_key}", match)
+
+        matches_endpoint = f"/event/{event_key}/matches"
+        if matches_endpoint in self.session.cache:
+            # new list rather than in-place so anyone diffing against the old one sees the change
+            old = self.session.cached_body(matches_endpoint) or []
+            # keep it where it was so the list stays in the order TBA gave it; only brand new matches go at the end
+            new = [match if m["key"] == match_key else m for m in old]
+            if not any(m["key"] == match_key for m in old):
+                new.append(match)
+            self._patch(matches_endpoint, new)
+
+        for suffix in _MATCH_DERIVED:
+            self.invalidate(f"/event/{event_key}/{suffix}")
+        # not worth patching the simple variants in too, just make them get refetched
+        self.invalidate(f"/event/{event_key}/matches/keys")
+        self.invalidate(f"/event/{event_key}/matches/simple")
+        self.invalidate(f"/match/{match_key}/simple")
+        year_matches = f"/matches/{event_key[:4]}"
+        for endpoint in [e for e in self.session.cache if e.startswith("/team/")]:
+            if f"/event/{event_key}/" in endpoint or year_matches in endpoint:
+                self.invalidate(endpoint)
+
+
+async def send(url: str, secret: str, message_type: str, data: dict, session: aiohttp.ClientSession = None) -> int:
+    """sends a signed webhook the way TBA would, for testing a receiver locally. returns the status code."""
+    body = json.dumps({"message_type": message_type, "message_data": data}).encode()
+    headers = {"Content-Type": "application/json", "X-TBA-HMAC": sign(secret, body)}
+    own = session is None
+    session = session or aiohttp.ClientSession()
+    try:
+        async with session.post(url, data=body, headers=headers) as response:
+            return response.status
+    finally:
+        if own:
+            await session.close()
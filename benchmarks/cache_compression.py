@@ -0,0 +1,87 @@
+"""
+Memory/CPU trade-off of TBASession(compress_cache=True).
+
+Builds a fake event's worth of matches shaped like /event/{key}/matches (score breakdowns included) and compares keeping
+the body as a dict against keeping it zlib'd, both for how much memory the cached body takes and for how long a cache hit
+takes to turn back into models.
+
+    python benchmarks/cache_compression.py [num_matches]
+"""
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+
+# so this runs straight out of a checkout without installing aiotba
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiotba.http import TBASession
+from aiotba.models import Match, List, to_model
+
+
+def fake_matches(n):
+    rng = random.Random(254)
+    matches = []
+    for i in range(1, n + 1):
+        teams = [f"frc{rng.randint(1, 9999)}" for _ in range(6)]
+
+        def breakdown():
+            d = {f"component{j}Points": rng.randint(0, 30) for j in range(30)}
+            d.update({f"robot{j}Status": rng.choice(["Parked", "OnStage", "None"]) for j in range(1, 4)})
+            d.update({"totalPoints": rng.randint(0, 150), "rp": rng.randint(0, 4), "foulCount": rng.randint(0, 3)})
+            return d
+
+        matches.append({
+            "key": f"2024casj_qm{i}",
+            "comp_level": "qm",
+            "set_number": 1,
+            "match_number": i,
+            "event_key": "2024casj",
+            "winning_alliance": rng.choice(["red", "blue"]),
+            "time": 1711000000 + i * 420,
+            "predicted_time": 1711000000 + i * 420,
+            "actual_time": 1711000000 + i * 420,
+            "post_result_time": 1711000000 + i * 420 + 300,
+            "alliances": {
+                color: {"score": rng.randint(0, 150), "team_keys": teams[k * 3:k * 3 + 3],
+                        "surrogate_team_keys": [], "dq_team_keys": []}
+                for k, color in enumerate(("red", "blue"))
+            },
+            "score_breakdown": {"red": breakdown(), "blue": breakdown()},
+            "videos": [{"key": "dQw4w9WgXcQ", "type": "youtube"}],
+        })
+    return matches
+
+
+def measure(data, compress):
+    ses = TBASession.__new__(TBASession)  # no aiohttp session needed to pack/unpack
+    ses.compress_cache = compress
+    # _pack/_unpack import json and zlib on first use; get that out of the way so it isn't counted as body memory
+    ses._unpack(ses._pack(data[:1]))
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    body = ses._pack(data) if compress else fake_matches(len(data))
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    hit = lambda: to_model(ses._unpack(body), List[Match])
+    per_hit = min(timeit.repeat(hit, number=5, repeat=3)) / 5
+    return size, per_hit
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 120
+    data = fake_matches(n)
+    plain_size, plain_hit = measure(data, False)
+    zip_size, zip_hit = measure(data, True)
+    print(f"{n} matches")
+    print(f"{'':12}{'body memory':>16}{'per cache hit':>16}")
+    print(f"{'dict':12}{plain_size / 1024:>13.1f} KiB{plain_hit * 1000:>13.2f} ms")
+    print(f"{'zlib':12}{zip_size / 1024:>13.1f} KiB{zip_hit * 1000:>13.2f} ms")
+    print(f"memory x{plain_size / zip_size:.1f} smaller, hits {zip_hit / plain_hit:.2f}x as slow")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+How long importing aiotba takes, via python -X importtime, so CI can keep an eye on it.
+
+    python benchmarks/import_time.py [--repeat 5] [--max-ms 50]
+
+Each statement runs in a fresh interpreter a few times and the best run counts. Exits non-zero if anything goes over
+--max-ms, or if aiohttp gets imported by something that shouldn't need it yet.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# statement -> whether it's allowed to drag in aiohttp
+STATEMENTS = {
+    "import aiotba": False,
+    "import aiotba.consts": False,
+    "from aiotba import TBASession": False,
+    "from aiotba.models import Match": False,
+}
+
+
+def import_time(stmt: str):
+    """returns (total µs spent on the statement's top-level aiotba imports, every module imported)"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", stmt], capture_output=True, text=True, check=True,
+                          cwd=ROOT)
+    total = 0
+    modules = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        modules.add(name.strip())
+        # unindented lines are top-level imports; nested ones are already counted in their parent's cumulative time
+        if name.startswith(" aiotba"):
+            total += int(cumulative)
+    return total, modules
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    failed = False
+    for stmt, aiohttp_ok in STATEMENTS.items():
+        runs = [import_time(stmt) for _ in range(args.repeat)]
+        best = min(total for total, _ in runs)
+        pulled_aiohttp = "aiohttp" in runs[0][1]
+        note = ""
+        if pulled_aiohttp and not aiohttp_ok:
+            note = "  <- imports aiohttp!"
+            failed = True
+        if args.max_ms is not None and best / 1000 > args.max_ms:
+            note += f"  <- over {args.max_ms} ms"
+            failed = True
+        print(f"{stmt:40}{best / 1000:>8.2f} ms{note}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Memory saved by TBASession(intern=True).
+
+Decodes a fake season's worth of teams and events (lots of repeated countries, states and districts) plus an event's
+matches, with and without an Interner, and compares how much memory the decoded models hold onto. Also checks what a
+MatchKey costs next to the plain string it replaces.
+
+    python benchmarks/interning.py
+"""
+import os
+import random
+import sys
+import tracemalloc
+
+# so this runs straight out of a checkout without installing aiotba
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiotba import keys
+from aiotba.models import Event, Interner, List, Match, Team, to_model
+from cache_compression import fake_matches
+
+
+def fake_teams(n):
+    rng = random.Random(254)
+    states = [("CA", "USA"), ("TX", "USA"), ("MI", "USA"), ("ON", "Canada"), ("Istanbul", "Türkiye")]
+    teams = []
+    for i in range(1, n + 1):
+        state, country = rng.choice(states)
+        teams.append({"key": f"frc{i}", "team_number": i, "nickname": f"Team {i}", "name": "Sponsors & High School",
+                      "city": "Somewhere", "state_prov": "".join(state), "country": "".join(country),
+                      "rookie_year": 1992 + i % 30, "home_championship": {"2019": "Houston"}})
+    return teams
+
+
+def fake_events(n):
+    rng = random.Random(1678)
+    districts = [("fim", "FIRST In Michigan"), ("ne", "New England"), ("pnw", "Pacific Northwest")]
+    events = []
+    for i in range(n):
+        abbrev, name = rng.choice(districts)
+        events.append({"key": f"2024ev{i}", "name": f"Event {i}", "event_code": f"ev{i}", "event_type": 1,
+                       "district": {"abbreviation": abbrev, "display_name": "".join(name), "key": f"2024{abbrev}",
+                                    "year": 2024},
+                       "country": "".join("USA"), "start_date": "2024-03-01", "end_date": "2024-03-03", "year": 2024,
+                       "webcasts": [{"type": "twitch", "channel": "firstinspires"}]})
+    return events
+
+
+def measure(payloads, interner):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    decoded = [to_model(data, model, interner=interner) for data, model in payloads]
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return size, decoded
+
+
+def key_memory(n):
+    """bytes per key for n distinct match keys, as plain strings and as MatchKeys (intern table and parse cache included)"""
+    raw = [f"2024ev{i // 100}_qm{i % 100 + 1}" for i in range(n)]
+    res = []
+    for make in (lambda k: (k + ".")[:-1], keys.MatchKey):
+        keys._parse_cached.cache_clear()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        made = [make(k) for k in raw]
+        res.append((tracemalloc.get_traced_memory()[0] - before) / n)
+        tracemalloc.stop()
+        del made
+    return res
+
+
+def main():
+    payloads = [(fake_teams(3000), List[Team]), (fake_events(200), List[Event]), (fake_matches(120), List[Match])]
+    plain, _ = measure(payloads, None)
+    interned, _ = measure(payloads, Interner())
+    print(f"plain    {plain / 1024:>10.1f} KiB")
+    print(f"interned {interned / 1024:>10.1f} KiB")
+    print(f"{(1 - interned / plain) * 100:.1f}% less")
+
+    for n in (1000, 15000):
+        plain_key, match_key = key_memory(n)
+        print(f"{n} match keys: str {plain_key:.0f} B/key, MatchKey {match_key:.0f} B/key")
+
+
+if __name__ == "__main__":
+    main()
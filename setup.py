@@ -18,6 +18,8 @@ setuptools.setup(
     url="https://github.com/guineawheek/aiotba",
     packages=setuptools.find_packages(),
     install_requires=reqs,
+    extras_require={"parquet": ["pyarrow"]},
+    entry_points={"console_scripts": ["aiotba=aiotba.__main__:main"]},
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",